@@ -1,14 +1,52 @@
 """SpuriousEmu interface"""
 
-from .code import Formatter
-from .compiler import Compiler, Unit, Program
-from .deobfuscation import Deobfuscator, ManglingClassifier
+from importlib import import_module
+
 from .error import *
-from .interpreter import Interpreter
-from .preprocessor import Preprocessor
-from .report import ReportGenerator
-from .serialize import Serializer
-from .syntax import Parser, AST
-from .side_effect import OutsideWorld
 
 __version__ = "0.4.1"
+
+# Names imported on first access, so that importing emu is fast and only loads
+# the submodules actually used, see PEP 562
+_LAZY_NAMES = {
+    "Formatter": ".code",
+    "Compiler": ".compiler",
+    "Unit": ".compiler",
+    "Program": ".compiler",
+    "Deobfuscator": ".deobfuscation",
+    "ManglingClassifier": ".deobfuscation",
+    "Interpreter": ".interpreter",
+    "Preprocessor": ".preprocessor",
+    "ReportGenerator": ".report",
+    "Serializer": ".serialize",
+    "Parser": ".syntax",
+    "AST": ".syntax",
+    "OutsideWorld": ".side_effect",
+}
+
+# Names exported by from emu import *, lazy ones being imported at this point
+__all__ = [
+    "PreprocessorError",
+    "ParsingError",
+    "InterpretationError",
+    "CompilationError",
+    "DeobfuscationError",
+    "OperatorError",
+    "ConversionError",
+    "ResolutionError",
+    "SerializationError",
+] + list(_LAZY_NAMES.keys())
+
+
+def __getattr__(name):
+    if name not in _LAZY_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(_LAZY_NAMES[name], __name__), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(_LAZY_NAMES.keys()))
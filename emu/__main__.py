@@ -1,31 +1,45 @@
 #! /usr/bin/env python
 
-import pkg_resources
-
 from argparse import ArgumentParser
+from codecs import BOM_UTF8
+from mmap import mmap, ACCESS_READ
 from pathlib import Path
-from sys import exit
-
-from magic import from_buffer as magic_from_buffer
-
-from oletools.olevba import VBA_Parser
+from sys import argv, exit
+from typing import List, Optional
 
 from emu import (
     Program,
     Compiler,
-    Deobfuscator,
-    Formatter,
-    Interpreter,
     Unit,
     __version__,
     OutsideWorld,
     ReportGenerator,
     Serializer,
-    SerializationError,
 )
+from emu.cache import Cache
+
+# Number of leading bytes checked to detect the input file type
+SNIFF_LENGTH = 4096
+
+# Extensions of VBA source files
+SOURCE_EXTENSIONS = (".vbs", ".bas", ".cls", ".frm")
+
+# Magic numbers of OLE and Office Open XML (zip) documents
+DOCUMENT_MAGICS = (b"\xd0\xcf\x11\xe0", b"PK\x03\x04")
 
+# Lowercase beginnings of the text-based documents supported by olevba: Word
+# 2003 XML and Flat OPC, MHTML, and RTF
+TEXT_DOCUMENT_MAGICS = (b"<", b"mime-version:", b"{\\rtf")
 
-def build_argparser():
+# Cache of compiled programs, only used by the command line interface
+cache = Cache()
+
+
+def build_argparser(mode: Optional[str] = None) -> ArgumentParser:
+    """
+    Build the command line parser. If mode is an operating mode, only build
+    the parser of this subcommand, as the other ones are not needed.
+    """
     parser = ArgumentParser(
         description="""VBA static and dynamic analysis tool for malware
                        analysts."""
@@ -40,7 +54,22 @@ def build_argparser():
         dest="mode", title="Operating mode", required=True
     )
 
-    # Static analysis
+    subcommands = {
+        "static": add_static_parser,
+        "dynamic": add_dynamic_parser,
+        "deobfuscate": add_deobfuscate_parser,
+        "report": add_report_parser,
+    }
+
+    for subcommand, add_parser in subcommands.items():
+        if mode not in subcommands or mode == subcommand:
+            add_parser(subparsers)
+
+    return parser
+
+
+def add_static_parser(subparsers) -> None:
+    """Add the parser of the static analysis subcommand."""
     static_parser = subparsers.add_parser(
         "static",
         help="Static analysis, allows symbols preview and file compilation.",
@@ -55,9 +84,10 @@ def build_argparser():
         help="""Input file, can be an Office document, some VBA source code, or
                 a SpuriousEmu compiled program""",
     )
-    static_parser.set_defaults(func=static_analysis)
 
-    # Dynamic analysis
+
+def add_dynamic_parser(subparsers) -> None:
+    """Add the parser of the dynamic analysis subcommand."""
     dynamic_parser = subparsers.add_parser(
         "dynamic",
         help="Dynamic analysis used to perform different kind of emulation.",
@@ -81,9 +111,10 @@ def build_argparser():
         help="""Input file, can be an Office document, some VBA source code, or
                 a SpuriousEmu compiled program""",
     )
-    dynamic_parser.set_defaults(func=dynamic_analysis)
 
-    # Deobfuscation
+
+def add_deobfuscate_parser(subparsers) -> None:
+    """Add the parser of the deobfuscation subcommand."""
     deobfuscate_parser = subparsers.add_parser(
         "deobfuscate", help="Deobfuscate macros."
     )
@@ -122,9 +153,10 @@ def build_argparser():
         help="""Input file, can be an Office document, some VBA source code, or
                 a SpuriousEmu compiled program""",
     )
-    deobfuscate_parser.set_defaults(func=deobfuscate)
 
-    # Report generation
+
+def add_report_parser(subparsers) -> None:
+    """Add the parser of the report generation subcommand."""
     report_parser = subparsers.add_parser(
         "report",
         help="""Extract information from analysis results generated by other
@@ -166,6 +198,12 @@ def build_argparser():
     report_format.add_argument(
         "--table", action="store_true", help="Use human-friendly output"
     )
+    report_parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="""Used with --json, produces unindented output, much faster for
+                large reports""",
+    )
     report_parser.add_argument(
         "-s",
         "--shorten",
@@ -181,54 +219,154 @@ def build_argparser():
                 elements of a series of similar events""",
     )
     report_parser.add_argument("input", help="Dynamic result file to use")
-    report_parser.set_defaults(func=generate_report)
 
-    return parser
+
+def project_manifest(path: Path) -> List[bytes]:
+    """
+    Describe a project directory with its name, and the relative path,
+    modification time and size of each of its source files.
+    """
+    manifest = [path.stem.encode("utf-8")]
+    for extension in ("cls", "bas"):
+        for file in sorted(path.rglob(f"*.{extension}")):
+            stat = file.stat()
+            description = (
+                f"{file.relative_to(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+            )
+            manifest.append(description.encode("utf-8"))
+
+    return manifest
 
 
-def compile_input_file(input_file: str) -> Program:
+def compile_input_file(
+    input_file: str, cache: Optional[Cache] = None
+) -> Program:
+    """
+    Compile an input file or project directory. If a cache is given, it is
+    used to skip the compilation of input already compiled.
+    """
     path = Path(input_file)
 
     if path.is_dir():
         # A directory must be a project containing VBA source files
-        return Compiler.compile_project(input_file)
+        if cache is None:
+            return Compiler.compile_project(input_file)
 
+        key = Cache.key(Program.schema(), *project_manifest(path))
+        program = cache.load(key)
+        if isinstance(program, Program):
+            return program
+
+        program = Compiler.compile_project(input_file, cache)
+        cache.store(key, program)
+        return program
+
+    content: Serializer.Buffer
     with open(input_file, "rb") as f:
-        content = f.read()
+        try:
+            # Map the file, so that only the pages actually used are read
+            content = mmap(f.fileno(), 0, access=ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty files and some platforms do not support mapping
+            content = f.read()
+
+    try:
+        return compile_content(input_file, content, cache)
+    finally:
+        if isinstance(content, mmap):
+            content.close()
+
+
+def compile_content(
+    input_file: str, content: Serializer.Buffer, cache: Optional[Cache] = None
+) -> Program:
+    """
+    Compile the content of an input file, which can be a serialized program,
+    VBA source code or an Office document. If a cache is given, it is used to
+    skip the compilation of content already compiled.
+    """
+    # Only try to deserialize content starting like a compiled program
+    program_magic = Serializer.magic(Program)
+    if content[: len(program_magic)] == program_magic:
+        return Serializer.deserialize(content)
+
+    if cache is None:
+        return compile_source(input_file, content)
+
+    # Use the result of a previous compilation of the same file if possible,
+    # by the same version of the parser and compiler
+    key = Cache.key(
+        Program.schema(), Path(input_file).name.encode("utf-8"), content
+    )
+    program = cache.load(key)
+    if isinstance(program, Program):
+        return program
+
+    program = compile_source(input_file, content, cache)
+    cache.store(key, program)
+    return program
+
+
+def is_source_code(input_file: str, content: Serializer.Buffer) -> bool:
+    """
+    Tell if the input file is VBA source code rather than an Office document.
+    Source code is recognized by its extension or, failing that, by a prefix
+    free of Office magic numbers and NUL bytes, not starting like a text-based
+    document, e.g. XML, and decodable as UTF-8.
+    """
+    if input_file.endswith(SOURCE_EXTENSIONS):
+        return True
+
+    head = bytes(content[:SNIFF_LENGTH])
+    if head.startswith(DOCUMENT_MAGICS) or b"\0" in head:
+        return False
+
+    start = head[len(BOM_UTF8) :] if head.startswith(BOM_UTF8) else head
+    if start.lstrip()[:16].lower().startswith(TEXT_DOCUMENT_MAGICS):
+        return False
 
-    # Try to deserialize an already compiled program
     try:
-        serializer = Serializer()
-        obj = serializer.deserialize(content)
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # The prefix can end in the middle of a multi-byte character
+        return (
+            len(head) == SNIFF_LENGTH and e.reason == "unexpected end of data"
+        )
+
+    return True
 
-        if type(obj) == Program:
-            return obj
-    except SerializationError:
-        pass
 
-    # Compile an Office document or VBA source files
-    units = []
-    if magic_from_buffer(content, mime=True) == "text/plain":
+def compile_source(
+    input_file: str, content: Serializer.Buffer, cache: Optional[Cache] = None
+) -> Program:
+    """
+    Compile an Office document or VBA source code. The cache, if any, is used
+    by the compiler to reuse the ASTs of already parsed macros.
+    """
+    if is_source_code(input_file, content):
         if not input_file.endswith(".vbs"):
             input_file += ".vbs"
-        units.append(Unit.from_content(content.decode("utf-8"), input_file))
+        # Decode straight from the buffer, without copying it to bytes first
+        source = str(content, "utf-8")
+        units = [Unit.from_content(source, input_file)]
     else:
-        vba_parser = VBA_Parser(input_file, data=content)
+        # Imported here as it is slow to load and useless for source code
+        from oletools.olevba import VBA_Parser
 
-        for _, _, vba_filename, vba_code in vba_parser.extract_all_macros():
-            units.append(Unit.from_content(vba_code, vba_filename))
+        vba_parser = VBA_Parser(input_file, data=bytes(content))
 
-    return Compiler.compile_units(units)
+        # Macros are parsed in parallel by the compiler
+        units = [
+            Unit.from_content(vba_code, vba_filename)
+            for _, _, vba_filename, vba_code in vba_parser.extract_all_macros()
+        ]
 
+    return Compiler.compile_units(units, cache=cache)
 
-def static_analysis(arguments):
-    # Check arguments validity
-    if not Path(arguments.input).exists():
-        print(f"Error: input file {arguments.input} does not exist.")
-        return 1
 
+def static_analysis(arguments):
     # Compile program
-    program = compile_input_file(arguments.input)
+    program = compile_input_file(arguments.input, cache)
 
     # Display symbols
     report_generator = ReportGenerator(program=program)
@@ -242,13 +380,15 @@ def static_analysis(arguments):
 
 
 def execute_program(program: Program, entry_point: str) -> None:
+    from emu import Interpreter
+
     linked_program = Compiler.link_standard_library(program)
     return Interpreter.run_program(linked_program, entry_point)
 
 
 def dynamic_analysis(arguments):
     # Load and execute
-    program = compile_input_file(arguments.input)
+    program = compile_input_file(arguments.input, cache)
     outside_world = execute_program(program, arguments.entry)
 
     # Produce timeline table report
@@ -270,7 +410,11 @@ def dynamic_analysis(arguments):
 
 
 def deobfuscate(arguments):
-    program = compile_input_file(arguments.input)
+    # Only needed by this command
+    import pkg_resources
+    from emu import Deobfuscator, Formatter
+
+    program = compile_input_file(arguments.input, cache)
     formatter = Formatter()
     deobfuscator = Deobfuscator(program)
     deobfuscator.evaluation_level = arguments.evaluate_pure_functions
@@ -322,6 +466,8 @@ def generate_report(arguments):
         format_specified = False
 
     report_generator.shorten = arguments.shorten
+    if arguments.compact:
+        report_generator.indent = None
     report_generator.skip_similar = arguments.skip_streaks
 
     # Produce report
@@ -349,17 +495,34 @@ def generate_report(arguments):
     return 1
 
 
+# Handler of each operating mode
+HANDLERS = {
+    "static": static_analysis,
+    "dynamic": dynamic_analysis,
+    "deobfuscate": deobfuscate,
+    "report": generate_report,
+}
+
+
 def main():
-    parser = build_argparser()
+    # Answer version requests without building the whole argument parser
+    if argv[1:] in (["-v"], ["--version"]):
+        print(f"SpuriousEmu v{__version__}")
+        return 0
+
+    parser = build_argparser(argv[1] if len(argv) > 1 else None)
     args = parser.parse_args()
 
-    # Check input
-    if hasattr(args, "input") and not Path(args.input).exists():
+    # A missing input is reported when opening it rather than checked first
+    try:
+        return HANDLERS[args.mode](args)
+    except FileNotFoundError as e:
+        if e.filename != args.input:
+            raise
+
         print(f"Error: input file {args.input} does not exist.")
         return 1
 
-    return args.func(args)
-
 
 if __name__ == "__main__":
     exit(main())
@@ -1,61 +1,168 @@
 """Definition of the nodes of an abstract syntax tree."""
 
-from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any, Union
+import sys
+
+from abc import abstractmethod
+from inspect import Parameter, signature
+from itertools import count, islice
+from pickle import UnpicklingError
+from typing import Iterable, List, Optional, Dict, Any, Tuple, Union
+from weakref import WeakValueDictionary
 
 from .type import Type
 from .visitor import Visitable
 
+# Return the next node hash, incremented in C on each call
+_next_ast_hash = count().__next__
+
+# Exact types of the field values to_dict keeps as is, checked first as most
+# fields, e.g. file and line_number, hold such values
+_JSON_NATIVE_TYPES = frozenset((str, int, float, bool, type(None)))
+
 
 ##################
 #  Base classes  #
 ##################
 
 
-class AST(Visitable, ABC):
-    """Base class of all the nodes of the tree."""
+class AST(Visitable):
+    """
+    Base class of all the nodes of the tree.
+
+    The public members of a node are listed in its _fields class attribute,
+    built at class creation from the parameters of the __init__ methods of the
+    class and its parents, and its type name is stored in _type_name. Nodes
+    store them in slots, which subclasses must declare in __slots__.
+
+    Strings repeated all over a program, like names, operators and file names,
+    are interned with sys.intern, so that they are stored once and mostly
+    compared by identity.
+
+    AST is not an ABC, as ABCMeta slows down isinstance checks, which are
+    used everywhere on nodes. Classes whose __init__ is marked with
+    abstractmethod can still not be instantiated.
+    """
+
+    __slots__ = ("__hash", "__weakref__")
 
-    __ast_nodes_number: int = 0
     __hash: int
+    _fields: Tuple[str, ...] = ()
+    _type_name: str = "AST"
+    _abstract: bool = True
 
     @abstractmethod
     def __init__(self) -> None:
-        self.__hash = AST.__ast_nodes_number
-        AST.__ast_nodes_number += 1
+        if self._abstract:
+            msg = f"Can't instantiate abstract class {type(self).__name__}"
+            raise TypeError(msg)
+
+        self.__hash = _next_ast_hash()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+
+        fields: List[str] = []
+        for parent in reversed(cls.__mro__):
+            if "__init__" not in vars(parent):
+                continue
+
+            parameters = signature(vars(parent)["__init__"]).parameters
+            for name, parameter in islice(parameters.items(), 1, None):
+                if parameter.kind in (
+                    Parameter.VAR_POSITIONAL,
+                    Parameter.VAR_KEYWORD,
+                ):
+                    continue
+
+                if name not in fields:
+                    fields.append(name)
+
+        cls._fields = tuple(fields)
+        cls._type_name = cls.__name__
+        cls._abstract = getattr(cls.__init__, "__isabstractmethod__", False)
 
     def to_dict(self) -> Dict[str, Any]:
         """
         Convert a tree to a recursive dict, using all the public members of
         the nodes as keys. A node has a '_type' key containing its type.
+        Strings, numbers, booleans and None are kept as is, other values are
+        converted to strings.
+
+        The tree is walked iteratively, so that deep trees, e.g. long
+        concatenations, don't hit the recursion limit. A node appearing
+        several times in the tree is converted once, and its dict is shared.
         """
-        d: Dict[str, Any]
-
-        def attribute_filter(attribute: str) -> bool:
-            return not attribute.startswith("_") and not callable(
-                getattr(self, attribute)
-            )
-
-        d = {"_type": type(self).__name__}
-        for attr_name in filter(attribute_filter, dir(self)):
-            attr = getattr(self, attr_name)
-
-            if isinstance(attr, AST):
-                d[attr_name] = attr.to_dict()
-            elif isinstance(attr, (list, tuple)):
-                d[attr_name] = []
-                for elt in attr:
-                    try:
-                        d[attr_name].append(elt.to_dict())
-                    except AttributeError:
-                        d[attr_name].append(elt)
-            else:
-                d[attr_name] = str(attr)
-
-        return d
+        root: Dict[str, Any] = dict()
+        converted: Dict[int, Dict[str, Any]] = {id(self): root}
+        stack = [(self, root)]
+
+        def convert(node: AST) -> Dict[str, Any]:
+            """Return the dict of a node, scheduling its filling if needed."""
+            try:
+                return converted[id(node)]
+            except KeyError:
+                d: Dict[str, Any] = dict()
+                converted[id(node)] = d
+                stack.append((node, d))
+                return d
+
+        while stack:
+            node, d = stack.pop()
+            d["_type"] = node._type_name
+
+            for attr_name in node._fields:
+                attr = getattr(node, attr_name)
+
+                if type(attr) in _JSON_NATIVE_TYPES:
+                    d[attr_name] = attr
+                elif isinstance(attr, AST):
+                    d[attr_name] = convert(attr)
+                elif isinstance(attr, (list, tuple)):
+                    d[attr_name] = [
+                        convert(elt) if isinstance(elt, AST) else elt
+                        for elt in attr
+                    ]
+                elif isinstance(attr, (str, int, float)):
+                    # Subclasses of JSON native types are kept as is too
+                    d[attr_name] = attr
+                else:
+                    d[attr_name] = str(attr)
+
+        return root
 
     def __hash__(self) -> int:
         return self.__hash
 
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Return the node hash and fields for pickling. They are keyed by name,
+        so that a node whose fields changed can't be restored with values
+        assigned to the wrong fields.
+        """
+        state = {name: getattr(self, name) for name in self._fields}
+        state["_AST__hash"] = self.__hash
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """
+        Restore a node from the state returned by __getstate__, or from the
+        __dict__ of nodes pickled before they used slots. A state missing some
+        fields of the node, or with unknown ones, raises UnpicklingError.
+        """
+        missing = [name for name in self._fields if name not in state]
+        if missing:
+            msg = f"{self._type_name} node pickled without fields {missing}"
+            raise UnpicklingError(msg)
+
+        for name, value in state.items():
+            try:
+                setattr(self, name, value)
+            except AttributeError:
+                msg = (
+                    f"{self._type_name} node pickled with unknown field {name}"
+                )
+                raise UnpicklingError(msg)
+
 
 class Statement(AST):
     """
@@ -63,6 +170,8 @@ class Statement(AST):
     declaration of e.g. a function.
     """
 
+    __slots__ = ("file", "line_number")
+
     file: str
     line_number: int
 
@@ -75,7 +184,7 @@ class Statement(AST):
         :arg line_number: Line number of the statement
         """
         super().__init__()
-        self.file = file
+        self.file = sys.intern(file)
         self.line_number = line_number
 
 
@@ -84,16 +193,21 @@ class Block(AST):
     Sequence of statements, used as is to describe the main scope of a file,
     or inherited to implement block statements (loops, conditionals,
     functions definition, ...).
+
+    Sequences of children, like the body, are stored as tuples, as nodes are
+    not modified once built.
     """
 
+    __slots__ = ("body",)
+
     # TODO add support for file and line_number
-    body: Optional[List[Union[Statement, "Block"]]]
+    body: Tuple[Union[Statement, "Block"], ...]
 
     def __init__(
-        self, body: Optional[List[Union[Statement, "Block"]]] = None
+        self, body: Optional[Iterable[Union[Statement, "Block"]]] = None
     ) -> None:
         super().__init__()
-        self.body = body if body is not None else []
+        self.body = tuple(body) if body is not None else ()
 
 
 ############################
@@ -107,6 +221,8 @@ class VarDec(Statement):
     with a one-member variable list.
     """
 
+    __slots__ = ("identifier", "type", "value", "new")
+
     identifier: "Identifier"
     type: Optional[Union[Type, "Identifier"]]
     value: Optional["Expression"]
@@ -118,9 +234,10 @@ class VarDec(Statement):
         type: Optional[Union[Type, "Identifier"]] = None,
         value: Optional["Expression"] = None,
         new: bool = False,
-        **kwargs,
+        file: str = "",
+        line_number: int = 0,
     ) -> None:
-        super().__init__(**kwargs)
+        super().__init__(file, line_number)
         self.identifier = identifier
         self.type = type
         self.value = value
@@ -134,21 +251,36 @@ class MultipleVarDec(Statement):
     with potentially multiple variables.
     """
 
-    declarations: List[VarDec]
+    __slots__ = ("declarations",)
+
+    declarations: Tuple[VarDec, ...]
 
-    def __init__(self, declarations: List[VarDec], **kwargs) -> None:
-        super().__init__(**kwargs)
-        self.declarations = declarations
+    def __init__(
+        self,
+        declarations: Iterable[VarDec],
+        file: str = "",
+        line_number: int = 0,
+    ) -> None:
+        super().__init__(file, line_number)
+        self.declarations = tuple(declarations)
 
 
 class VarAssign(Statement):
     """Variable assignment."""
 
+    __slots__ = ("variable", "value")
+
     variable: Union["Get", "Identifier"]
     value: "Expression"
 
-    def __init__(self, variable: "Get", value: "Expression", **kwargs) -> None:
-        super().__init__(**kwargs)
+    def __init__(
+        self,
+        variable: "Get",
+        value: "Expression",
+        file: str = "",
+        line_number: int = 0,
+    ) -> None:
+        super().__init__(file, line_number)
         self.variable = variable
         self.value = value
 
@@ -156,6 +288,8 @@ class VarAssign(Statement):
 class FunDef(Block):
     """Function definition, corresponding to the Function keyword."""
 
+    __slots__ = ("name", "arguments")
+
     name: "Identifier"
     arguments: "ArgListDef"
 
@@ -163,9 +297,9 @@ class FunDef(Block):
         self,
         name: "Identifier",
         arguments: Optional["ArgListDef"] = None,
-        **kwargs,
+        body: Optional[Iterable[Union[Statement, Block]]] = None,
     ) -> None:
-        super().__init__(**kwargs)
+        super().__init__(body)
         self.name = name
         self.arguments = arguments if arguments is not None else ArgListDef([])
 
@@ -173,6 +307,8 @@ class FunDef(Block):
 class ProcDef(Block):
     """Procedure definition, corresponding to the Sub keyword."""
 
+    __slots__ = ("name", "arguments")
+
     name: "Identifier"
     arguments: "ArgListDef"
 
@@ -180,9 +316,9 @@ class ProcDef(Block):
         self,
         name: "Identifier",
         arguments: Optional["ArgListDef"] = None,
-        **kwargs,
+        body: Optional[Iterable[Union[Statement, Block]]] = None,
     ) -> None:
-        super().__init__(**kwargs)
+        super().__init__(body)
         self.name = name
         self.arguments = arguments if arguments is not None else ArgListDef([])
 
@@ -198,24 +334,46 @@ class Expression(Statement):
     literals, identifiers and function calls as leafs.
     """
 
+    __slots__ = ()
+
     @abstractmethod
-    def __init__(self, **kwargs) -> None:
-        super().__init__(**kwargs)
+    def __init__(self, file: str = "", line_number: int = 0) -> None:
+        super().__init__(file, line_number)
 
 
 class Identifier(Expression):
     """Identifier of a variable or function."""
 
+    __slots__ = ("name",)
+
+    __pool: "WeakValueDictionary[str, Identifier]" = WeakValueDictionary()
+
     name: str
 
-    def __init__(self, name: str, **kwargs) -> None:
-        super().__init__(**kwargs)
-        self.name = name
+    def __init__(self, name: str, file: str = "", line_number: int = 0) -> None:
+        super().__init__(file, line_number)
+        self.name = sys.intern(name)
+
+    @staticmethod
+    def intern(name: str) -> "Identifier":
+        """
+        Return an identifier without position information, shared with the
+        other interned identifiers with the same name while it is in use. The
+        returned node must not be modified.
+        """
+        try:
+            return Identifier.__pool[name]
+        except KeyError:
+            identifier = Identifier(name)
+            Identifier.__pool[name] = identifier
+            return identifier
 
 
 class Get(Expression):
     """Recursive node corresponding to the . operator."""
 
+    __slots__ = ("parent", "child")
+
     parent: Union["Get", Identifier, "FunCall"]
     child: Identifier
 
@@ -223,9 +381,10 @@ class Get(Expression):
         self,
         parent: Union["Get", Identifier, "FunCall"],
         child: Identifier,
-        **kwargs,
+        file: str = "",
+        line_number: int = 0,
     ) -> None:
-        super().__init__(**kwargs)
+        super().__init__(file, line_number)
         self.parent = parent
         self.child = child
 
@@ -233,51 +392,94 @@ class Get(Expression):
 class Literal(Expression):
     """Literal value : integer, double, boolean, string, ..."""
 
+    __slots__ = ("type", "value")
+
+    __pool: "WeakValueDictionary[Tuple[Type, Any], Literal]" = (
+        WeakValueDictionary()
+    )
+
     type: Type
     value: Union[int, float, bool, str]
 
     def __init__(
-        self, type: Type, value: Union[int, float, bool, str], **kwargs
+        self,
+        type: Type,
+        value: Union[int, float, bool, str],
+        file: str = "",
+        line_number: int = 0,
     ) -> None:
-        super().__init__(**kwargs)
+        super().__init__(file, line_number)
         self.value = value
         self.type = type
 
     @staticmethod
     def from_value(value) -> "Literal":
-        return Literal(value.base_type, value.value)
+        """Return the interned literal corresponding to a Value."""
+        return Literal.intern(value.base_type, value.value)
+
+    @staticmethod
+    def intern(type: Type, value: Union[int, float, bool, str]) -> "Literal":
+        """
+        Return a literal without position information, shared with the other
+        interned literals with the same type and value while it is in use. The
+        returned node must not be modified.
+        """
+        key = (type, value)
+        try:
+            return Literal.__pool[key]
+        except KeyError:
+            literal = Literal(type, value)
+            Literal.__pool[key] = literal
+            return literal
+        except TypeError:
+            # Unhashable values can't be interned
+            return Literal(type, value)
 
 
 class ArgListCall(Statement):
     """List of arguments, used by function calls"""
 
-    args: List["Expression"]
+    __slots__ = ("args",)
+
+    args: Tuple["Expression", ...]
 
-    def __init__(self, args: List["Expression"], **kwargs) -> None:
-        super().__init__(**kwargs)
-        self.args = args
+    def __init__(
+        self, args: Iterable["Expression"], file: str = "", line_number: int = 0
+    ) -> None:
+        super().__init__(file, line_number)
+        self.args = tuple(args)
 
 
 class ArgListDef(Statement):
     """List of arguments, used by function declarations"""
 
-    args: List[Identifier]
+    __slots__ = ("args",)
 
-    def __init__(self, args: List["Identifier"], **kwargs) -> None:
-        super().__init__(**kwargs)
-        self.args = args
+    args: Tuple[Identifier, ...]
+
+    def __init__(
+        self, args: Iterable["Identifier"], file: str = "", line_number: int = 0
+    ) -> None:
+        super().__init__(file, line_number)
+        self.args = tuple(args)
 
 
 class FunCall(Expression):
     """Function call"""
 
+    __slots__ = ("function", "arguments")
+
     function: Union[Get, Identifier]
     arguments: ArgListCall
 
     def __init__(
-        self, function: Union[Get, Identifier], arguments: ArgListCall, **kwargs
+        self,
+        function: Union[Get, Identifier],
+        arguments: ArgListCall,
+        file: str = "",
+        line_number: int = 0,
     ) -> None:
-        super().__init__(**kwargs)
+        super().__init__(file, line_number)
         self.function = function
         self.arguments = arguments
 
@@ -285,27 +487,42 @@ class FunCall(Expression):
 class UnOp(Expression):
     """Unary operator"""
 
+    __slots__ = ("operator", "argument")
+
     operator: str
     argument: Expression
 
-    def __init__(self, operator: str, argument: Expression, **kwargs) -> None:
-        super().__init__(**kwargs)
-        self.operator = operator
+    def __init__(
+        self,
+        operator: str,
+        argument: Expression,
+        file: str = "",
+        line_number: int = 0,
+    ) -> None:
+        super().__init__(file, line_number)
+        self.operator = sys.intern(operator)
         self.argument = argument
 
 
 class BinOp(Expression):
     """Binary operator"""
 
+    __slots__ = ("operator", "left", "right")
+
     operator: str
     left: Expression
     right: Expression
 
     def __init__(
-        self, operator: str, left: Expression, right: Expression, **kwargs
+        self,
+        operator: str,
+        left: Expression,
+        right: Expression,
+        file: str = "",
+        line_number: int = 0,
     ) -> None:
-        super().__init__(**kwargs)
-        self.operator = operator
+        super().__init__(file, line_number)
+        self.operator = sys.intern(operator)
         self.left = left
         self.right = right
 
@@ -318,36 +535,46 @@ class BinOp(Expression):
 class ElseIf(Block):
     """Single condition/action block, used internally by If"""
 
+    __slots__ = ("condition",)
+
     condition: Expression
 
-    def __init__(self, condition: Expression, **kwargs) -> None:
-        super().__init__(**kwargs)
+    def __init__(
+        self,
+        condition: Expression,
+        body: Optional[Iterable[Union[Statement, Block]]] = None,
+    ) -> None:
+        super().__init__(body)
         self.condition = condition
 
 
 class If(Block):
     """If statement"""
 
+    __slots__ = ("condition", "elsifs", "else_block")
+
     condition: Expression
-    elsifs: List[ElseIf]
+    elsifs: Tuple[ElseIf, ...]
     else_block: Optional[Block]
 
     def __init__(
         self,
         condition: Expression,
-        elsifs: Optional[List[ElseIf]] = None,
+        elsifs: Optional[Iterable[ElseIf]] = None,
         else_block: Optional[Block] = None,
-        **kwargs,
+        body: Optional[Iterable[Union[Statement, Block]]] = None,
     ) -> None:
-        super().__init__(**kwargs)
+        super().__init__(body)
         self.condition = condition
-        self.elsifs = elsifs if elsifs is not None else []
+        self.elsifs = tuple(elsifs) if elsifs is not None else ()
         self.else_block = else_block
 
 
 class For(Block):
     """For statement with a counter"""
 
+    __slots__ = ("counter", "start", "end", "step")
+
     counter: Identifier
     start: Expression
     end: Expression
@@ -359,9 +586,9 @@ class For(Block):
         start: Expression,
         end: Expression,
         step: Optional[Expression] = None,
-        **kwargs,
+        body: Optional[Iterable[Union[Statement, Block]]] = None,
     ) -> None:
-        super().__init__(**kwargs)
+        super().__init__(body)
         self.counter = counter
         self.start = start
         self.end = end
@@ -379,12 +606,17 @@ class OnError(Statement):
     else to a GoTo policy.
     """
 
+    __slots__ = ("goto",)
+
     goto: Optional[Union[Literal, Identifier]]
 
     def __init__(
-        self, goto: Optional[Union[int, Identifier]] = None, **kwargs
+        self,
+        goto: Optional[Union[int, Identifier]] = None,
+        file: str = "",
+        line_number: int = 0,
     ) -> None:
-        super().__init__(**kwargs)
+        super().__init__(file, line_number)
         self.goto = goto
 
 
@@ -394,20 +626,29 @@ class Resume(Statement):
     else to a GoTo form.
     """
 
+    __slots__ = ("goto",)
+
     goto: Optional[Union[Literal, Identifier]]
 
     def __init__(
-        self, goto: Optional[Union[int, Identifier]] = None, **kwargs
+        self,
+        goto: Optional[Union[int, Identifier]] = None,
+        file: str = "",
+        line_number: int = 0,
     ) -> None:
-        super().__init__(**kwargs)
+        super().__init__(file, line_number)
         self.goto = goto
 
 
 class ErrorStatement(Statement):
     """Error statement."""
 
+    __slots__ = ("number",)
+
     number: Literal
 
-    def __init__(self, number: Literal, **kwargs) -> None:
-        super().__init__(**kwargs)
+    def __init__(
+        self, number: Literal, file: str = "", line_number: int = 0
+    ) -> None:
+        super().__init__(file, line_number)
         self.number = number
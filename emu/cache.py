@@ -0,0 +1,157 @@
+"""On-disk cache of compilation results, to skip recompiling unchanged input."""
+
+import os
+import pickle
+
+from hashlib import blake2b
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from . import __version__
+
+
+class Cache:
+    """
+    Content-addressed cache storing pickled objects in a directory, by
+    default spuriousemu in the XDG cache directory, $XDG_CACHE_HOME or
+    ~/.cache. Keys are built with the key method from the
+    content identifying the cached object, and the SpuriousEmu version. At
+    most max_entries objects are kept, the least recently used ones being
+    removed first.
+
+    Objects are pickled directly rather than with Serializer, so that any
+    picklable object, e.g. an AST, can be cached, and so that the compiler
+    can use the cache without importing the serialization module.
+
+    Set the SPURIOUSEMU_NO_CACHE environment variable to 1 to disable it: load
+    then always misses and store does nothing.
+    """
+
+    DISABLE_VARIABLE = "SPURIOUSEMU_NO_CACHE"
+    DEFAULT_MAX_ENTRIES = 256
+
+    directory: Path
+    max_entries: int
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, os.PathLike]] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        if directory is None:
+            self.directory = Cache.default_directory()
+        else:
+            self.directory = Path(directory)
+
+        self.max_entries = max_entries
+
+    @staticmethod
+    def default_directory() -> Path:
+        """Return the default cache directory, following the XDG convention."""
+        xdg_cache_home = os.environ.get("XDG_CACHE_HOME", "")
+
+        # Relative paths are invalid and must be ignored
+        if os.path.isabs(xdg_cache_home):
+            base_directory = Path(xdg_cache_home)
+        else:
+            base_directory = Path.home() / ".cache"
+
+        return base_directory / "spuriousemu"
+
+    @property
+    def enabled(self) -> bool:
+        return os.environ.get(Cache.DISABLE_VARIABLE, "0") != "1"
+
+    @staticmethod
+    def key(*parts: bytes) -> str:
+        """
+        Build a key from byte strings, e.g. the content of a file, using the
+        SpuriousEmu version so that a new release does not use stale results.
+        Each part is prefixed with its length, so that different parts can't
+        produce the same key once concatenated.
+        """
+        hasher = blake2b(digest_size=16)
+        for part in parts:
+            hasher.update(len(part).to_bytes(8, "little"))
+            hasher.update(part)
+
+        return f"{hasher.hexdigest()}-{__version__}"
+
+    def load(self, key: str) -> Optional[Any]:
+        """
+        Return the object cached with the given key, or None if it is not
+        cached or can't be loaded.
+        """
+        if not self.enabled:
+            return None
+
+        path = self.directory / key
+        try:
+            with open(path, "rb") as f:
+                obj = pickle.load(f)
+        except Exception:
+            # Missing or corrupted entries are simply recompiled
+            return None
+
+        # Mark the entry as recently used, so that it is evicted last
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return obj
+
+    def store(self, key: str, obj: Any) -> None:
+        """
+        Cache an object. The entry is written to a temporary file which is
+        then atomically renamed, so that an interrupted write can't leave a
+        corrupted entry behind. The least recently used entries are then
+        evicted if there are more than max_entries. Failing to write the cache
+        is not an error.
+        """
+        if not self.enabled:
+            return
+
+        try:
+            content = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # e.g. trees too deep to be pickled, which are simply not cached
+            return
+
+        path = self.directory / key
+        tmp_path = self.directory / f"{key}.{os.getpid()}.tmp"
+
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+            return
+
+        self.__evict()
+
+    def __evict(self) -> None:
+        """Remove the least recently used entries above max_entries."""
+        try:
+            with os.scandir(self.directory) as it:
+                entries = [
+                    (entry.stat().st_mtime_ns, entry.path)
+                    for entry in it
+                    if entry.is_file() and not entry.name.endswith(".tmp")
+                ]
+        except OSError:
+            return
+
+        entries.sort()
+        for _, path in entries[: max(len(entries) - self.max_entries, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                # e.g. already evicted by another process
+                pass
@@ -10,9 +10,8 @@ from .visitor import Visitor
 @dataclass
 class Formatter(Visitor[str]):
     """
-    Allow to format an AST to VBA code. You can call format_ast several times,
-    the object will accumulate the formatted results which you can get with the
-    output field. To start a new output, use reset.
+    Allow to format an AST to VBA code. format_ast returns the formatted code
+    of each AST, and can be called several times with the same object.
 
     You can configure the identation character with the indentation field, and
     the end-of-line with eol.
@@ -21,42 +20,56 @@ class Formatter(Visitor[str]):
     indentation: str = " " * 4
     eol: str = "\n"
 
-    __formatted_node: Optional[str] = field(init=False, repr=None, default=None)
     __indentation_level: int = field(init=False, repr=None, default=0)
     __newline: str = field(init=False, repr=None)
+    __indents: List[str] = field(init=False, repr=None)
 
     def __post_init__(self) -> None:
         self.__newline = self.eol * 2
+        # Indentation strings of the usual levels, built once
+        self.__indents = [self.indentation * level for level in range(16)]
 
     def format_ast(self, ast: AST) -> str:
-        """
-        Format an AST to VBA, add it to the current output, and return the
-        formatted AST.
-        """
+        """Format an AST to VBA and return the formatted code."""
         output = self.visit(ast)
         assert self.__indentation_level == 0
         return output
 
     def __indent(self) -> str:
         """Return the current indentation string."""
-        return self.__indentation_level * self.indentation
+        try:
+            return self.__indents[self.__indentation_level]
+        except IndexError:
+            return self.__indentation_level * self.indentation
+
+    def __parenthesize(self, expr: Expression) -> str:
+        """Format an operand, with parentheses if it is a binary operation."""
+        if isinstance(expr, BinOp):
+            return "(" + self.visit(expr) + ")"
+        else:
+            return self.visit(expr)
 
-    # visit_ methods
-    def visit(self, *args, **kwargs) -> str:
-        tmp = self.__indentation_level
-        ret = super().visit(*args, **kwargs)
-        assert tmp == self.__indentation_level
-        return ret
+    def __indented_block(self, block: Block) -> str:
+        """Format the body of a block, one level deeper than the block."""
+        self.__indentation_level += 1
+        output = self.visit_Block(block)
+        self.__indentation_level -= 1
 
+        return output
+
+    # visit_ methods
     def visit_Block(self, block: Block) -> str:
-        output = ""
+        # Join the statements once, instead of growing a string
+        output = []
         for statement in block.body:
             if isinstance(statement, FunCall):
-                output += self.__indent() + self.visit(statement) + self.eol
+                output.extend(
+                    [self.__indent(), self.visit(statement), self.eol]
+                )
             else:
-                output += self.visit(statement)
+                output.append(self.visit(statement))
 
-        return output
+        return "".join(output)
 
     def visit_VarDec(self, var_dec: VarDec) -> str:
         output = self.__indent() + f"Dim " + self.visit(var_dec.identifier)
@@ -81,24 +94,34 @@ class Formatter(Visitor[str]):
         return output + self.eol
 
     def visit_FunDef(self, fun_def: FunDef) -> str:
-        output = self.__indent() + "Function " + self.visit(fun_def.name)
-        output += self.visit(fun_def.arguments) + self.eol
-        self.__indentation_level += 1
-        output += self.visit_Block(fun_def)
-        self.__indentation_level -= 1
-        output += self.__indent() + "End Function" + self.__newline
-
-        return output
+        output = [
+            self.__indent(),
+            "Function ",
+            self.visit(fun_def.name),
+            self.visit(fun_def.arguments),
+            self.eol,
+            self.__indented_block(fun_def),
+            self.__indent(),
+            "End Function",
+            self.__newline,
+        ]
+
+        return "".join(output)
 
     def visit_ProcDef(self, proc_def: ProcDef) -> str:
-        output = self.__indent() + "Sub " + self.visit(proc_def.name)
-        output += self.visit(proc_def.arguments) + self.eol
-        self.__indentation_level += 1
-        output += self.visit_Block(proc_def)
-        self.__indentation_level -= 1
-        output += self.__indent() + "End Sub" + self.__newline
-
-        return output
+        output = [
+            self.__indent(),
+            "Sub ",
+            self.visit(proc_def.name),
+            self.visit(proc_def.arguments),
+            self.eol,
+            self.__indented_block(proc_def),
+            self.__indent(),
+            "End Sub",
+            self.__newline,
+        ]
+
+        return "".join(output)
 
     def visit_Identifier(self, identifier: Identifier) -> str:
         return identifier.name
@@ -114,18 +137,14 @@ class Formatter(Visitor[str]):
             return str(literal.value)
 
     def visit_ArgListCall(self, arg_list_call: ArgListCall) -> str:
-        output = "("
-        output += ", ".join(self.visit(arg) for arg in arg_list_call.args)
-        output += ")"
+        arguments = ", ".join([self.visit(arg) for arg in arg_list_call.args])
 
-        return output
+        return f"({arguments})"
 
     def visit_ArgListDef(self, arg_list_def: ArgListDef) -> str:
-        output = "("
-        output += ", ".join(self.visit(arg) for arg in arg_list_def.args)
-        output += ")"
+        arguments = ", ".join([self.visit(arg) for arg in arg_list_def.args])
 
-        return output
+        return f"({arguments})"
 
     def visit_FunCall(self, fun_call: FunCall) -> str:
         return self.visit(fun_call.function) + self.visit(fun_call.arguments)
@@ -139,64 +158,77 @@ class Formatter(Visitor[str]):
         return output
 
     def visit_BinOp(self, bin_op: BinOp) -> str:
-        def parenthesize(expr: Expression) -> str:
-            if isinstance(expr, BinOp):
-                return "(" + self.visit(expr) + ")"
-            else:
-                return self.visit(expr)
+        left = self.__parenthesize(bin_op.left)
+        right = self.__parenthesize(bin_op.right)
 
-        output = parenthesize(bin_op.left)
-        output += " " + bin_op.operator + " "
-        output += parenthesize(bin_op.right)
-
-        return output
+        return f"{left} {bin_op.operator} {right}"
 
     def visit_ElseIf(self, else_if: ElseIf) -> str:
-        output = self.__indent() + "ElseIf " + self.visit(else_if.condition)
-        output += " Then" + self.eol
-        self.__indentation_level += 1
-        output += self.visit_Block(else_if)
-        self.__indentation_level -= 1
+        output = [
+            self.__indent(),
+            "ElseIf ",
+            self.visit(else_if.condition),
+            " Then",
+            self.eol,
+            self.__indented_block(else_if),
+        ]
 
-        return output
+        return "".join(output)
 
     def visit_If(self, if_block: If) -> str:
-        output = self.eol + self.__indent() + "If "
-        output += self.visit(if_block.condition) + " Then" + self.eol
-        self.__indentation_level += 1
-        output += self.visit_Block(if_block)
-        self.__indentation_level -= 1
-
-        output += "".join(self.visit(else_if) for else_if in if_block.elsifs)
+        output = [
+            self.eol,
+            self.__indent(),
+            "If ",
+            self.visit(if_block.condition),
+            " Then",
+            self.eol,
+            self.__indented_block(if_block),
+        ]
+
+        output.extend([self.visit(else_if) for else_if in if_block.elsifs])
 
         if if_block.else_block is not None:
-            output += self.__indent() + "Else" + self.eol
-            self.__indentation_level += 1
-            output += self.visit_Block(if_block.else_block)
-            self.__indentation_level -= 1
+            output.extend(
+                [
+                    self.__indent(),
+                    "Else",
+                    self.eol,
+                    self.__indented_block(if_block.else_block),
+                ]
+            )
 
-        output += self.__indent() + "End If" + self.__newline
+        output.extend([self.__indent(), "End If", self.__newline])
 
-        return output
+        return "".join(output)
 
     def visit_For(self, for_loop: For) -> str:
-        output = self.eol + self.__indent() + "For "
-        output += self.visit(for_loop.counter)
-        output += " = " + self.visit(for_loop.start)
-        output += " To " + self.visit(for_loop.end)
+        output = [
+            self.eol,
+            self.__indent(),
+            "For ",
+            self.visit(for_loop.counter),
+            " = ",
+            self.visit(for_loop.start),
+            " To ",
+            self.visit(for_loop.end),
+        ]
 
         if for_loop.step is not None:
-            output += " Step " + self.visit(for_loop.step)
-
-        output += self.eol
-
-        self.__indentation_level += 1
-        output += self.visit_Block(for_loop)
-        self.__indentation_level -= 1
-
-        output += self.__indent() + "Next " + self.visit(for_loop.counter)
-
-        return output + self.__newline
+            output.extend([" Step ", self.visit(for_loop.step)])
+
+        output.extend(
+            [
+                self.eol,
+                self.__indented_block(for_loop),
+                self.__indent(),
+                "Next ",
+                self.visit(for_loop.counter),
+                self.__newline,
+            ]
+        )
+
+        return "".join(output)
 
     def visit_OnError(self, on_error: OnError) -> str:
         output = self.__indent() + "On Error "
@@ -1,18 +1,23 @@
 """Pseudo-compilation stage: allow to extract references and function body."""
 
-import pkg_resources
+import sys
 
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass, field
+from functools import lru_cache
+from hashlib import blake2b
 from importlib.util import spec_from_file_location, module_from_spec
 from inspect import getmembers, isclass, isfunction
-from itertools import chain
+from os import cpu_count
 from pathlib import Path
+from pickle import PicklingError
 from types import ModuleType
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 from .reference import *
 from .abstract_syntax_tree import *
-from .error import ResolutionError
+from .cache import Cache
 from .function import ExternalFunction, InternalFunction
 from .side_effect import Memory
 from .syntax import Parser
@@ -42,6 +47,16 @@ class Program:
         d["environment"] = self.environment.to_dict()
         return d
 
+    @staticmethod
+    def schema() -> bytes:
+        """
+        Describe how programs are built: the AST schema, and a digest of the
+        source of the compiler and interpreter modules. Used in the keys of
+        cached programs, so that programs built by another version of these
+        modules are not loaded.
+        """
+        return _program_schema()
+
 
 @dataclass
 class Unit:
@@ -90,6 +105,90 @@ class Unit:
         return Unit(file_content, unit_type, path.stem)
 
 
+# Modules whose source determines the AST built from some VBA code
+_PARSER_MODULES = (
+    "syntax.py",
+    "preprocessor.py",
+    "partial_block.py",
+    "abstract_syntax_tree.py",
+)
+
+# Modules whose source determines the program compiled from some ASTs
+_COMPILER_MODULES = (
+    "compiler.py",
+    "reference.py",
+    "function.py",
+    "vba_class.py",
+    "side_effect.py",
+    "value.py",
+    "interpreter.py",
+)
+
+
+def _source_digest(modules: Tuple[str, ...]) -> str:
+    """Return a digest of the source of some modules of the package."""
+    hasher = blake2b(digest_size=16)
+    for module in modules:
+        hasher.update((Path(__file__).parent / module).read_bytes())
+
+    return hasher.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _ast_schema() -> bytes:
+    """
+    Describe how ASTs are built: the fields of each node class, a digest of
+    the source of the parser modules, and the Python version. Used in the keys
+    of cached ASTs, so that ASTs produced by another version of the parser or
+    with another node layout, e.g. during development, are not loaded.
+    """
+    classes = []
+    remaining = [AST]
+    while remaining:
+        cls = remaining.pop()
+        classes.append((cls.__name__, cls._fields))
+        remaining.extend(cls.__subclasses__())
+
+    digest = _source_digest(_PARSER_MODULES)
+    schema = (sys.version_info[:2], sorted(classes), digest)
+    return repr(schema).encode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def _program_schema() -> bytes:
+    """See Program.schema."""
+    digest = _source_digest(_COMPILER_MODULES).encode("utf-8")
+    return _ast_schema() + b":" + digest
+
+
+def _parse_source(content: str, name: str) -> AST:
+    """
+    Parse the source code of a unit. Defined at module level, and only using
+    the unit attributes as Unit.Type can't be pickled, to be usable by a
+    process pool.
+    """
+    return Parser.parse(content, name)
+
+
+def _parse_sources(contents: List[str], names: List[str]) -> List[AST]:
+    """
+    Parse the source code of several units, in parallel by a process pool if
+    there are several units and cores. If the workers can't send an AST back,
+    e.g. as deep concatenation chains of obfuscated macros exceed the
+    recursion limit when pickled, the units are parsed in this process.
+    """
+    # A pool is only worth its start-up cost with several units and cores
+    workers = min(len(contents), cpu_count() or 1)
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(workers) as executor:
+                return list(executor.map(_parse_source, contents, names))
+        except (RecursionError, PicklingError, BrokenProcessPool):
+            pass
+
+    return list(map(_parse_source, contents, names))
+
+
 class Compiler(Visitor):
     """
     Class used for references extraction. You can analyse several modules in a
@@ -132,9 +231,9 @@ class Compiler(Visitor):
         elif type(self.__current_reference) is Project:
             pass
         elif type(self.__current_reference) is Environment:
-            try:
+            if self.__environment.has_child("Default"):
                 project = self.__environment.get_child("Default")
-            except ResolutionError:
+            else:
                 project = self.__environment.build_child(
                     Project, name="Default"
                 )
@@ -266,9 +365,6 @@ class Compiler(Visitor):
         for arg in args:
             self.__try_add_variable(arg)
 
-        if type(definition) is FunDef:
-            self.__try_add_variable(name)
-
         self.__try_add_variable(name)
         self.visit_Block(definition)
         self.__current_reference = self.__current_reference.parent
@@ -276,11 +372,8 @@ class Compiler(Visitor):
     def __try_add_variable(self, name: str) -> None:
         assert isinstance(self.__current_reference, (Module, FunctionReference))
 
-        try:
-            self.__current_reference.get_child(name)
+        if self.__current_reference.has_child(name):
             return
-        except ResolutionError:
-            pass
 
         if isinstance(self.__current_reference, ProceduralModule):
             extent = Variable.Extent.Module
@@ -344,23 +437,48 @@ class Compiler(Visitor):
 
     @staticmethod
     def compile_units(
-        units: List[Unit], project: Optional[str] = None
+        units: List[Unit],
+        project: Optional[str] = None,
+        cache: Optional[Cache] = None,
     ) -> Program:
         """
-        Compile a list of units belonging to the same project.
+        Compile a list of units belonging to the same project. If a cache is
+        given, the ASTs of units already parsed are loaded from its ast
+        subdirectory. The other units are parsed, in parallel when possible,
+        see _parse_sources. The units are then added to the program in order.
         """
         compiler = Compiler()
 
         if project is not None:
             compiler.add_project(project)
 
-        for unit in units:
+        asts: List[Optional[AST]] = [None] * len(units)
+        if cache is not None:
+            ast_cache = Cache(cache.directory / "ast", cache.max_entries)
+            # The AST does not depend on the unit name, only on its content
+            schema = _ast_schema()
+            keys = [
+                Cache.key(schema, unit.content.encode("utf-8"))
+                for unit in units
+            ]
+            asts = [ast_cache.load(key) for key in keys]
+
+        missing = [i for i, ast in enumerate(asts) if not isinstance(ast, AST)]
+        contents = [units[i].content for i in missing]
+        names = [units[i].name for i in missing]
+
+        parsed = _parse_sources(contents, names)
+        for i, ast in zip(missing, parsed):
+            asts[i] = ast
+            if cache is not None:
+                ast_cache.store(keys[i], ast)
+
+        for unit, ast in zip(units, asts):
             if unit.unit_type is Unit.Type.Class:
                 module_type = ClassModule
             else:
                 module_type = ProceduralModule
 
-            ast = Parser.parse(unit.content, unit.name)
             compiler.add_module(ast, module_type, unit.name)
 
         return compiler.program
@@ -371,33 +489,35 @@ class Compiler(Visitor):
 
     @staticmethod
     def compile_files(
-        paths: List[str], project: Optional[str] = None
+        paths: List[str],
+        project: Optional[str] = None,
+        cache: Optional[Cache] = None,
     ) -> Program:
         """
         Parse and compile a list of files with Office extensions (cls and bas)
-        or vbs extension for standalone scripts.
+        or vbs extension for standalone scripts. See compile_units for the use
+        of the cache.
         """
         units = [Unit.from_file(path) for path in paths]
-        return Compiler.compile_units(units, project)
+        return Compiler.compile_units(units, project, cache)
 
     @staticmethod
-    def compile_project(project_path: str) -> Program:
+    def compile_project(
+        project_path: str, cache: Optional[Cache] = None
+    ) -> Program:
         """
         Recursively compile a directory, only taking into accound cls and bas
-        files.
+        files. See compile_units for the use of the cache.
         """
         path = Path(project_path)
         assert path.is_dir()
-        paths = list(
-            chain(list(path.rglob(f"*.{ext}")) for ext in ("cls", "bas"))
-        )
         paths = [
             str(file.absolute())
             for glob in (path.rglob(f"*.{ext}") for ext in ("cls", "bas"))
             for file in glob
         ]
 
-        return Compiler.compile_files(paths, path.stem)
+        return Compiler.compile_files(paths, path.stem, cache)
 
     @staticmethod
     def link_standard_library(program: Program) -> Program:
@@ -405,6 +525,9 @@ class Compiler(Visitor):
         Extract the standard library embedded in the package resources and link
         it against a program. Embedded projects are stored inside emu.lib.
         """
+        # Slow to import, and only needed for dynamic analysis
+        import pkg_resources
+
         compiler = Compiler()
         compiler.__memory = program.memory
         compiler.__environment = program.environment
@@ -136,13 +136,15 @@ class Deobfuscator(Visitor[AST]):
 
     def __deobfuscate(self, elt: Any) -> Any:
         """
-        Internal de-obfuscation method, which can handle AST, lists (whose
-        elements are individually de-obfuscated) and any other type, which is
-        returned as-is.
+        Internal de-obfuscation method, which can handle AST, lists and tuples
+        (whose elements are individually de-obfuscated) and any other type,
+        which is returned as-is.
         """
-        # list
+        # list or tuple
         if isinstance(elt, list):
             return list(map(self.__deobfuscate, elt))
+        if isinstance(elt, tuple):
+            return tuple(map(self.__deobfuscate, elt))
 
         # non AST
         if not isinstance(elt, AST):
@@ -168,10 +170,11 @@ class Deobfuscator(Visitor[AST]):
         :arg new_attributes: Use it to force the value of some fields
         :returns: An equivalent de-obfuscated AST
         """
-        for attribute, value in ast.__dict__.items():
-            if attribute.startswith("_") or attribute in new_attributes:
+        for attribute in ast._fields:
+            if attribute in new_attributes:
                 continue
 
+            value = getattr(ast, attribute)
             new_attributes[attribute] = self.__deobfuscate(value)
 
         return type(ast)(**new_attributes)
@@ -147,20 +147,26 @@ class PartialBlock:
             blocks = zip(self.statements_blocks, self.elements)
             if_body, if_header = next(blocks)
             assert isinstance(if_header, IfHeader)
-            if_block = If(condition=if_header.condition, body=if_body)
+            elsifs = []
+            else_block = None
 
             for statements, element in blocks:
                 if isinstance(element, ElseIfHeader):
                     elseif = ElseIf(
                         condition=element.condition, body=statements
                     )
-                    if_block.elsifs.append(elseif)
+                    elsifs.append(elseif)
                 elif isinstance(element, ElseHeader):
                     else_block = Block(statements)
-                    if_block.else_block = else_block
                 elif isinstance(element, IfFooter):
                     break
 
+            if_block = If(
+                condition=if_header.condition,
+                elsifs=elsifs,
+                else_block=else_block,
+                body=if_body,
+            )
             return if_block
 
         elif isinstance(header, ProcDefHeader):
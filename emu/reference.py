@@ -53,6 +53,10 @@ class Reference(ABC):
             msg = f"Reference {self} doesn't have child called {name}"
             raise ResolutionError(msg)
 
+    def has_child(self, name: str) -> bool:
+        """Tell if the current reference has a child with the given name."""
+        return any(child.name == name for child in self.children)
+
     def add_child(self, child: "Reference") -> None:
         """
         Add a child to the current reference, updating its parent field.
@@ -60,14 +64,13 @@ class Reference(ABC):
         :throws CompilationError: If there is already a child with the same
         name
         """
-        try:
-            self.get_child(child.name)
+        if self.has_child(child.name):
             msg = f"Reference {self} already has a child called {child.name}"
             raise CompilationError(msg)
-        except ResolutionError:
-            self.children.append(child)
-            child.parent = self
-            child.__full_name = f"{self.__full_name}.{child.name}"
+
+        self.children.append(child)
+        child.parent = self
+        child.__full_name = f"{self.__full_name}.{child.name}"
 
     def build_child(self, child_type, *args, **kwargs) -> "Reference":
         """
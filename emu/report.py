@@ -2,20 +2,21 @@
 
 import csv
 import json
+import os
 
 from dataclasses import dataclass, field
 from enum import Enum
 from io import StringIO
 from hashlib import md5
-from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
-
-from prettytable import PrettyTable
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 
 from .compiler import Program
 from .side_effect import OutsideWorld
 from .serialize import Serializer
 
+if TYPE_CHECKING:
+    from prettytable import PrettyTable
+
 
 def _needs_outside_world(method):
     error_msg = (
@@ -46,6 +47,20 @@ def _needs_program(method):
     return decorated
 
 
+def _render_column(title: str, items: List[str]) -> str:
+    """
+    Render a single left-aligned column table, in the same layout as
+    PrettyTable, in a single pass over the items.
+    """
+    width = max(len(title), max(map(len, items), default=0))
+    border = "+" + "-" * (width + 2) + "+"
+    lines = [border, f"| {title.ljust(width)} |", border]
+    lines.extend(f"| {item.ljust(width)} |" for item in items)
+    lines.append(border)
+
+    return "\n".join(lines)
+
+
 @dataclass
 class ReportGenerator:
     """
@@ -57,7 +72,8 @@ class ReportGenerator:
 
     You can customize the generated reports using the object attributes:
         - output_format : the output format
-        - indent : Number of spaces for JSON indentation
+        - indent : Number of spaces for JSON indentation, None for compact
+          output which is much faster to produce for large reports
         - reproducible: If True, don't display event time
         - skip_similar: If > 0, skip series of similar events in TABLE output
         - hash_algorithm: hashing algorithm used to name files
@@ -76,7 +92,7 @@ class ReportGenerator:
     program: Optional[Program] = None
     outside_world: Optional[OutsideWorld] = None
     output_format: "ReportGenerator.Format" = field(default=Format.JSON)
-    indent: int = 4
+    indent: Optional[int] = 4
     reproducible: bool = False
     skip_similar: int = 0
     hash_algorithm = md5
@@ -84,18 +100,25 @@ class ReportGenerator:
 
     # Utility methods
 
-    def hash_file(self, content: str) -> str:
+    def hash_file(self, content: Union[str, bytes]) -> str:
         """
-        Return the hex digest of the file content encoded in UTF8, using
-        the self.hash algorithm.
+        Return the hex digest of the file content, using the
+        self.hash_algorithm algorithm. str content is encoded in UTF8, pass
+        already encoded bytes to avoid encoding it again.
         """
-        hasher = self.hash_algorithm()
-        hasher.update(content.encode("utf-8"))
+        if isinstance(content, str):
+            content = content.encode("utf-8")
 
-        return hasher.hexdigest()
+        return self.hash_algorithm(content).hexdigest()
 
     def to_json(self, report: Any) -> str:
-        """Return the JSON dump of the report."""
+        """
+        Return the JSON dump of the report. Without indentation, the C
+        accelerated encoder of the json module is used.
+        """
+        if self.indent is None:
+            return json.dumps(report, separators=(",", ":"), sort_keys=True)
+
         return json.dumps(report, indent=self.indent, sort_keys=True)
 
     def event_to_tuple(
@@ -174,7 +197,9 @@ class ReportGenerator:
 
         return data1["type"] == data2["type"]
 
-    def events_to_table(self, events: List[OutsideWorld.Event]) -> PrettyTable:
+    def events_to_table(
+        self, events: List[OutsideWorld.Event]
+    ) -> "PrettyTable":
         """
         Build a table containing a list of events. The table has the columns
         ('ID', 'Time (s)', 'Category', 'Context', 'Data') and an event by row.
@@ -182,6 +207,9 @@ class ReportGenerator:
         Depending on shorten and skip_similar, series of similar events can be
         skiped.
         """
+        # Only imported when needed, as tables are not always produced
+        from prettytable import PrettyTable
+
         fields = ("ID", "Time (s)", "Category", "Context", "Data")
         table = PrettyTable(fields)
         table.align = "l"
@@ -234,9 +262,10 @@ class ReportGenerator:
     @_needs_program
     def extract_symbols(self) -> Dict[str, List[str]]:
         """Returns a dictionnary with 'functions' and 'classes' keys."""
-        memory_dict = self.program.to_dict()["memory"]
-        functions = memory_dict["functions"]
-        classes = memory_dict["classes"]
+        # Only the memory is needed, don't build the whole program dict
+        memory = self.program.memory
+        functions = sorted(memory.functions.keys())
+        classes = sorted(memory.classes.keys())
 
         return {"functions": functions, "classes": classes}
 
@@ -250,11 +279,8 @@ class ReportGenerator:
         if self.output_format is ReportGenerator.Format.CSV:
             return "CSV not supported"
         elif self.output_format is ReportGenerator.Format.TABLE:
-            classes = PrettyTable()
-            classes.add_column("Classes", symbols["classes"], align="l")
-
-            functions = PrettyTable()
-            functions.add_column("Functions", symbols["functions"], align="l")
+            classes = _render_column("Classes", symbols["classes"])
+            functions = _render_column("Functions", symbols["functions"])
 
             return f"{classes}\n\n{functions}"
 
@@ -284,7 +310,7 @@ class ReportGenerator:
         timeline = self.extract_timeline()
 
         if self.output_format is ReportGenerator.Format.JSON:
-            return json.dumps(timeline, indent=self.indent, sort_keys=True)
+            return self.to_json(timeline)
         elif self.output_format is ReportGenerator.Format.CSV:
             return self.events_to_csv(timeline)
         elif self.output_format is ReportGenerator.Format.TABLE:
@@ -300,8 +326,11 @@ class ReportGenerator:
     @_needs_outside_world
     def produce_organized_events(self) -> str:
         """Return the events, organized by category."""
-        report = dict()
+        report: Dict[str, List[Dict[str, Any]]] = dict()
+        tuples: Dict[str, List["ReportGenerator.EventLine"]] = dict()
+        is_table = self.output_format == ReportGenerator.Format.TABLE
 
+        # Group the events in a single pass
         for event in self.outside_world.events:
             category = event.category.value
             event_dict = {
@@ -310,35 +339,30 @@ class ReportGenerator:
                 "context": event.context,
                 "data": event.data,
             }
+            report.setdefault(category, []).append(event_dict)
 
-            category_list = report.get(event.category.value, [])
-            report[category] = category_list + [event_dict]
+            if is_table:
+                event_tuple = self.event_to_tuple(event)
+                tuples.setdefault(category, []).append(event_tuple)
 
         if self.output_format == ReportGenerator.Format.JSON:
             return self.to_json(report)
         elif self.output_format == ReportGenerator.Format.CSV:
             return "CSV not supported yet"
-        elif self.output_format == ReportGenerator.Format.TABLE:
-            output = ""
-
-            for category in report:
-                output += f"{category}:\n"
-                events = [
-                    self.event_to_tuple(event)
-                    for event in self.outside_world.events
-                    if event.category.value == category
-                ]
-                table = self.events_to_table(events)
-
-                if self.shorten:
-                    fields = ("ID", "Context", "Data")
-                else:
-                    fields = ("ID", "Time (s)", "Context", "Data")
+        elif is_table:
+            if self.shorten:
+                fields = ("ID", "Context", "Data")
+            else:
+                fields = ("ID", "Time (s)", "Context", "Data")
 
-                output += table.get_string(fields=fields)
-                output += "\n\n"
+            output = []
+            for category, events in tuples.items():
+                table = self.events_to_table(events)
+                output.append(f"{category}:\n")
+                output.append(table.get_string(fields=fields))
+                output.append("\n\n")
 
-            return output
+            return "".join(output)
 
     @_needs_outside_world
     def extract_files(self, save_directory: str) -> None:
@@ -351,18 +375,18 @@ class ReportGenerator:
 
         :arg save_directory: Output directory, created if it does not exist.
         """
-        path = Path(save_directory)
-        path.mkdir(exist_ok=True)
+        os.makedirs(save_directory, exist_ok=True)
 
         for name, content in self.outside_world.files.items():
-            content_hash = self.hash_file(content)
-            content_path = path.joinpath(content_hash)
-            filename_path = path.joinpath(f"{content_hash}.filename.txt")
+            # Encode once, and use the same buffer for hashing and writing
+            data = content.encode("utf-8")
+            content_hash = self.hash_file(data)
+            content_path = os.path.join(save_directory, content_hash)
 
-            with open(content_path.absolute(), "w") as f:
-                f.write(content)
+            with open(content_path, "wb") as f:
+                f.write(data)
 
-            with open(filename_path.absolute(), "w") as f:
+            with open(content_path + ".filename.txt", "w") as f:
                 f.write(name)
 
     @_needs_outside_world
@@ -1,8 +1,11 @@
 """Allow serialization of SpuriousEmu objects"""
 
+import os
 import pickle
+import pickletools
 
 from dataclasses import dataclass
+from mmap import mmap
 from pathlib import Path
 from typing import List, Union
 
@@ -38,13 +41,23 @@ class Serializer:
 
     SerializableType = Union[Program, OutsideWorld, ManglingClassifier]
 
+    # Buffers that can be deserialized without being copied
+    Buffer = Union[bytes, bytearray, memoryview, mmap]
+
     @classmethod
     def serialize(cls, obj: SerializableType) -> bytes:
+        """
+        Serialize a Python object, prepending the magic string of its format.
+        The body is pickled with the highest available protocol, and unused
+        memo entries are stripped to get smaller and faster to load files.
+        """
         if not isinstance(obj, Serializer.SerializableType.__args__):
             msg = f"Serialization of {type(obj)} is not supported"
             raise SerializationError(msg)
 
-        body = pickle.dumps(obj)
+        body = pickletools.optimize(
+            pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        )
         magic = cls.magic(type(obj))
 
         return magic + body
@@ -54,6 +67,9 @@ class Serializer:
         """
         Serialize a Python object and save it to a file, potentially overriding
         it. If the save path has no extension, add the corresponding one.
+
+        The content is written to a temporary file which then replaces the
+        save path, so that an interrupted save can't leave a corrupted file.
         """
         path = Path(file_path)
         if path.suffix == "":
@@ -62,17 +78,31 @@ class Serializer:
             save_path = path
 
         content = cls.serialize(obj)
+        tmp_path = save_path.parent / (save_path.name + ".tmp")
 
-        with open(save_path, "wb") as f:
-            f.write(content)
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, save_path)
+        except BaseException:
+            if tmp_path.exists():
+                os.remove(tmp_path)
+            raise
 
     @classmethod
-    def deserialize(cls, content: bytes) -> SerializableType:
+    def deserialize(cls, content: "Serializer.Buffer") -> SerializableType:
+        """
+        Deserialize an object based on its magic string. content can be any
+        bytes-like object, e.g. a memory-mapped file.
+        """
         for fmt in cls.FORMATS:
             magic = fmt.magic_string
-            if content.startswith(magic):
-                body = content[len(magic) :]
-                return pickle.loads(body)
+            if content[: len(magic)] == magic:
+                # Use views to avoid copying the content. They are released
+                # even if unpickling fails, otherwise a mapped content could
+                # not be closed while the traceback is alive.
+                with memoryview(content) as view, view[len(magic) :] as body:
+                    return pickle.loads(body)
 
         raise SerializationError("Unsupported format")
 
@@ -259,7 +259,7 @@ operator_keyword = (
 integer = (
     Word(nums)
     .setName("integer")
-    .setParseAction(lambda r: Literal(Type.Integer, r[0]))
+    .setParseAction(lambda r: Literal.intern(Type.Integer, r[0]))
 )
 
 # Boolean
@@ -270,14 +270,14 @@ false_kw = Keyword("False")
 boolean = (
     (true_kw | false_kw)
     .setName("boolean")
-    .setParseAction(lambda r: Literal(Type.Boolean, r[0]))
+    .setParseAction(lambda r: Literal.intern(Type.Boolean, r[0]))
 )
 
 # String
 string = (
     QuotedString(quoteChar='"', escQuote='""')
     .setName("string")
-    .setParseAction(lambda r: Literal(Type.String, r[0]))
+    .setParseAction(lambda r: Literal.intern(Type.String, r[0]))
 )
 
 
@@ -294,12 +294,12 @@ identifier_regex = r"(?:[a-zA-Z]|_[a-zA-Z])[a-zA-Z0-9_]*"
 identifier = (
     (~reserved + Regex(identifier_regex))
     .setName("identifier")
-    .setParseAction(lambda r: Identifier(r[0]))
+    .setParseAction(lambda r: Identifier.intern(r[0]))
 )
 identifier_keyword = (
     Regex(identifier_regex)
     .setName("identifier keyword")
-    .setParseAction(lambda r: Identifier(r[0]))
+    .setParseAction(lambda r: Identifier.intern(r[0]))
 )
 
 # Types
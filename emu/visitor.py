@@ -9,12 +9,14 @@ can then call visit(SubVisitable).
 
 
 from abc import abstractmethod
-from typing import Any, Generic, TypeVar
+from typing import Any, Callable, Dict, Generic, TypeVar
 
 
 class Visitable:
     """Base class for Visitable classes, must simply be inherited."""
 
+    __slots__ = ()
+
     @abstractmethod
     def __init__(self):
         pass
@@ -22,17 +24,7 @@ class Visitable:
     def accept(self, visitor: "Visitor") -> Any:
         assert isinstance(visitor, Visitor)
 
-        visiter = "visit_" + type(self).__qualname__.replace(".", "_")
-        try:
-            visiter_function = getattr(visitor, visiter)
-        except AttributeError:
-            msg = (
-                f"Visitor {type(visitor).__qualname__} doesn't handle "
-                + f"Visitable type {type(self).__qualname__}"
-            )
-            raise NotImplementedError(msg)
-
-        return visiter_function(self)
+        return visitor.visit(self)
 
 
 T = TypeVar("T")
@@ -46,12 +38,22 @@ class Visitor(Generic[T]):
     algorithm to a Visitable object visitable, simply call
     visitor.visit(visitable). Use the class argument T to specify the output
     type of the visit_ methods.
+
+    The visit_ method handling a Visitable type, or its absence, is looked up
+    once per Visitor class, and then stored in the _dispatch_table class
+    attribute.
     """
 
+    _dispatch_table: Dict[type, Callable[["Visitor", Any], T]] = dict()
+
     @abstractmethod
     def __init__(self):
         pass
 
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._dispatch_table = dict()
+
     def visit(self, visitable: Visitable) -> T:
         """
         Apply an algorithm to a Visitable object of type T. The algorithm must
@@ -59,4 +61,34 @@ class Visitor(Generic[T]):
         """
         assert isinstance(visitable, Visitable)
 
-        return visitable.accept(self)
+        visitable_type = type(visitable)
+        try:
+            visiter_function = self._dispatch_table[visitable_type]
+        except KeyError:
+            visiter_function = self.__find_visiter(visitable_type)
+
+        return visiter_function(self, visitable)
+
+    @classmethod
+    def __find_visiter(
+        cls, visitable_type: type
+    ) -> Callable[["Visitor", Any], T]:
+        """
+        Return the visit_ method of a Visitable type, and store it. If there is
+        none, a function raising NotImplementedError is stored instead, so
+        that unhandled types are also looked up only once.
+        """
+        visiter = "visit_" + visitable_type.__qualname__.replace(".", "_")
+        try:
+            visiter_function = getattr(cls, visiter)
+        except AttributeError:
+            msg = (
+                f"Visitor {cls.__qualname__} doesn't handle "
+                + f"Visitable type {visitable_type.__qualname__}"
+            )
+
+            def visiter_function(visitor: "Visitor", visitable: Any) -> T:
+                raise NotImplementedError(msg)
+
+        cls._dispatch_table[visitable_type] = visiter_function
+        return visiter_function
@@ -0,0 +1,11 @@
+import atexit
+import os
+import shutil
+
+from tempfile import mkdtemp
+
+# Use a temporary cache directory, also inherited by the emu commands run by the
+# tests, so that they neither use nor fill the cache of the user
+_cache_home = mkdtemp(prefix="spuriousemu-tests-")
+os.environ["XDG_CACHE_HOME"] = _cache_home
+atexit.register(shutil.rmtree, _cache_home, ignore_errors=True)
@@ -0,0 +1,151 @@
+import os
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from nose.tools import assert_equals
+
+from emu import Compiler
+from emu.cache import Cache
+from emu.compiler import Program, _ast_schema, _program_schema
+from tests.test import source_path
+
+
+def test_store_load():
+    program = Compiler.compile_file(source_path("interpreter_01"))
+
+    with TemporaryDirectory() as directory:
+        cache = Cache(directory)
+        key = Cache.key(b"interpreter_01")
+
+        assert cache.load(key) is None
+        cache.store(key, program)
+        cached_program = cache.load(key)
+
+        assert_equals(os.listdir(directory), [key])
+
+    assert_equals(type(program), type(cached_program))
+    assert_equals(program.to_dict(), cached_program.to_dict())
+
+
+def test_disabled():
+    program = Compiler.compile_file(source_path("interpreter_01"))
+
+    with TemporaryDirectory() as directory:
+        cache = Cache(directory)
+        key = Cache.key(b"interpreter_01")
+
+        os.environ[Cache.DISABLE_VARIABLE] = "1"
+        try:
+            cache.store(key, program)
+            assert cache.load(key) is None
+        finally:
+            del os.environ[Cache.DISABLE_VARIABLE]
+
+        assert_equals(os.listdir(directory), [])
+
+
+def test_key_parts():
+    assert Cache.key(b"ab", b"c") != Cache.key(b"a", b"bc")
+    assert Cache.key(b"ab", b"c") == Cache.key(b"ab", b"c")
+
+
+def test_eviction():
+    with TemporaryDirectory() as directory:
+        cache = Cache(directory, max_entries=2)
+        keys = [Cache.key(bytes([i])) for i in range(3)]
+
+        cache.store(keys[0], 0)
+        cache.store(keys[1], 1)
+        os.utime(Path(directory) / keys[0], ns=(0, 0))
+        os.utime(Path(directory) / keys[1], ns=(1, 1))
+
+        # Loading an entry makes it the most recently used one
+        assert_equals(cache.load(keys[0]), 0)
+        cache.store(keys[2], 2)
+
+        assert_equals(sorted(os.listdir(directory)), sorted(keys[::2]))
+
+
+def test_default_directory():
+    previous = os.environ.get("XDG_CACHE_HOME")
+
+    try:
+        os.environ["XDG_CACHE_HOME"] = "/tmp/xdg"
+        assert_equals(Cache().directory, Path("/tmp/xdg/spuriousemu"))
+
+        os.environ["XDG_CACHE_HOME"] = "relative"
+        expected = Path.home() / ".cache" / "spuriousemu"
+        assert_equals(Cache().directory, expected)
+    finally:
+        if previous is None:
+            del os.environ["XDG_CACHE_HOME"]
+        else:
+            os.environ["XDG_CACHE_HOME"] = previous
+
+
+def test_ast_cache():
+    path = source_path("interpreter_01")
+
+    with TemporaryDirectory() as directory:
+        cache = Cache(directory)
+        ast_directory = Path(directory) / "ast"
+
+        program = Compiler.compile_files([path], cache=cache)
+        assert_equals(len(os.listdir(ast_directory)), 1)
+
+        # The cached AST must be used instead of parsing the unit again
+        with patch("emu.compiler._parse_source") as parse_source:
+            cached_program = Compiler.compile_files([path], cache=cache)
+            assert not parse_source.called
+
+    assert_equals(program.to_dict(), cached_program.to_dict())
+    for name, ast in program.asts.items():
+        assert_equals(ast.to_dict(), cached_program.asts[name].to_dict())
+
+
+def test_no_ast_cache():
+    previous = os.environ.get("XDG_CACHE_HOME")
+
+    try:
+        with TemporaryDirectory() as directory:
+            os.environ["XDG_CACHE_HOME"] = directory
+            Compiler.compile_file(source_path("interpreter_01"))
+
+            # The library does not use a cache by default
+            assert_equals(os.listdir(directory), [])
+    finally:
+        if previous is None:
+            del os.environ["XDG_CACHE_HOME"]
+        else:
+            os.environ["XDG_CACHE_HOME"] = previous
+
+
+def test_ast_schema_parser():
+    schema = _ast_schema()
+    _ast_schema.cache_clear()
+
+    try:
+        # A change of the parser source must invalidate the cached ASTs
+        with patch.object(Path, "read_bytes", return_value=b"new parser"):
+            assert schema != _ast_schema()
+    finally:
+        _ast_schema.cache_clear()
+
+    assert_equals(schema, _ast_schema())
+
+
+def test_program_schema():
+    schema = Program.schema()
+    assert schema.startswith(_ast_schema())
+    _program_schema.cache_clear()
+
+    try:
+        # A change of the compiler source must invalidate the cached programs
+        with patch("emu.compiler._source_digest", return_value="new"):
+            assert schema != Program.schema()
+    finally:
+        _program_schema.cache_clear()
+
+    assert_equals(schema, Program.schema())
@@ -1,4 +1,6 @@
-from emu import Parser, Compiler, reference
+from unittest.mock import patch
+
+from emu import Parser, Compiler, Unit, reference
 from tests.test import assert_correct_function, SourceFile, Result
 
 
@@ -35,3 +37,14 @@ def test_standard_library():
 
 def test_project():
     assert_correct_function("compiler_project", compile_project)
+
+
+def test_parallel_deep_expression():
+    # Too deep to be pickled by the workers of the process pool
+    content = "Dim a\na = " + " & ".join(['"x"'] * 1500) + "\n"
+    units = [Unit.from_content(content, f"module_{i}.bas") for i in range(2)]
+
+    with patch("emu.compiler.cpu_count", return_value=4):
+        program = Compiler.compile_units(units)
+
+    assert sorted(program.asts.keys()) == ["module_0", "module_1"]
@@ -1,4 +1,5 @@
 from emu import __version__
+from emu.__main__ import SNIFF_LENGTH, is_source_code
 from tests.test import assert_correct_output
 
 
@@ -7,6 +8,14 @@ def test_version():
     assert_correct_output("emu_version", "emu -v")
 
 
+def test_star_import():
+    namespace = dict()
+    exec("from emu import *", namespace)
+
+    for name in ("Compiler", "Formatter", "Program", "ParsingError"):
+        assert name in namespace
+
+
 def test_basic_static():
     assert_correct_output("emu_basic_static", "emu static", 0)
 
@@ -23,3 +32,27 @@ def test_load_program_dynamic():
         "emu dynamic -e Document_Close "
         "tests/samples/01_gamaredon_first_stage.spemu-com",
     )
+
+
+def test_is_source_code():
+    source = b'Sub Main()\r\n    MsgBox "\xc3\xa9"\r\nEnd Sub\r\n'
+    assert is_source_code("macro", source)
+    assert is_source_code("macro.bas", b"\xd0\xcf\x11\xe0")
+
+    # A multi-byte character can be cut at the end of the sniffed prefix
+    cut_source = b"'" * (SNIFF_LENGTH - 1) + "\xe9".encode("utf-8")
+    assert is_source_code("macro", cut_source)
+
+    documents = (
+        b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",
+        b"PK\x03\x04",
+        b'<?xml version="1.0"?>\r\n<w:wordDocument>',
+        b'\xef\xbb\xbf<?xml version="1.0"?>',
+        b"\r\n<pkg:package>",
+        b"MIME-Version: 1.0\r\nContent-Type: multipart/related",
+        b"{\\rtf1\\ansi",
+        b"Sub Main()\0",
+        b'MsgBox "\xe9"',
+    )
+    for document in documents:
+        assert not is_source_code("document", document)
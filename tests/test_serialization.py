@@ -1,8 +1,14 @@
 # TODO add infile tests
 
-from nose.tools import assert_equals
+import pickle
 
-from emu import Serializer, Compiler
+from mmap import mmap, ACCESS_READ
+from tempfile import TemporaryFile
+
+from nose.tools import assert_equals, assert_raises
+
+from emu import Serializer, Compiler, Program
+from emu.abstract_syntax_tree import Identifier
 from tests.test import source_path
 
 
@@ -12,3 +18,38 @@ def test_serialization_deserialization():
     deserial = Serializer.deserialize(serial)
     assert_equals(type(program), type(deserial))
     assert_equals(program.to_dict(), deserial.to_dict())
+
+
+def test_deserialization_error_mmap():
+    content = Serializer.magic(Program) + b"garbage"
+
+    with TemporaryFile() as f:
+        f.write(content)
+        f.flush()
+        mapped_content = mmap(f.fileno(), 0, access=ACCESS_READ)
+
+        try:
+            Serializer.deserialize(mapped_content)
+        except Exception as e:
+            # The views on the content must not outlive the deserialization
+            assert not isinstance(e, BufferError)
+            mapped_content.close()
+        else:
+            assert False, "Deserialization of garbage succeeded"
+
+
+def test_ast_state():
+    identifier = Identifier("a", "file.vbs", 2)
+    restored = pickle.loads(pickle.dumps(identifier))
+    assert_equals(identifier.to_dict(), restored.to_dict())
+
+    # Fields are restored by name, a layout change must be detected
+    state = identifier.__getstate__()
+    del state["name"]
+    with assert_raises(pickle.UnpicklingError):
+        Identifier.__new__(Identifier).__setstate__(state)
+
+    state = identifier.__getstate__()
+    state["old_name"] = "b"
+    with assert_raises(pickle.UnpicklingError):
+        Identifier.__new__(Identifier).__setstate__(state)